@@ -1,17 +1,16 @@
 import os
+# Tesseract's OpenMP threads fight each other when several calls run at once
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
 import cv2
-import numpy as np
-import pyaudio
-import wave
 import threading
 import time
-import tempfile
 import re
-from datetime import datetime
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from pydub import AudioSegment
 from pydub.playback import play
-from queue import Queue
-from scipy.signal import butter, filtfilt
+from queue import Empty, Full, Queue
 
 from src.processors.speaker import Speaker
 from src.utils.audio_recorder import AudioRecorder
@@ -19,63 +18,167 @@ from src.processors.heavy_ocr import HeavyOCRProcessor
 from src.processors.light_ocr import LightOCRProcessor
 from src.processors.transcriber import AudioTranscriber
 
+# Voice command that triggers OCR
+TRIGGER_RE = re.compile(r'what is written (here|there)', re.IGNORECASE)
+
+
+class LatestFrameGrabber:
+    """Drain the camera on a background thread and serve only the newest frame"""
+    
+    def __init__(self, cap):
+        self.cap = cap
+        self.frame = None
+        self.lock = threading.Condition()
+        self.run = True
+        self.thread = threading.Thread(target=self._grab)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def _grab(self):
+        while self.run:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self.lock:
+                self.frame = frame
+                self.lock.notify_all()
+    
+    def read(self, timeout=1.0):
+        """Wait for a frame newer than the last one read, like cap.read()"""
+        with self.lock:
+            if not self.lock.wait_for(lambda: self.frame is not None, timeout):
+                return False, None
+            # Hand the frame over so callers can draw on it freely
+            frame, self.frame = self.frame, None
+            return True, frame
+    
+    def stop(self):
+        self.run = False
+        self.thread.join(timeout=1.0)
+
 
+def prepare_scan_frame(frame, scale=0.5):
+    """Downsample and grayscale a frame for the light OCR scan"""
+    small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
 
-def save_frame_to_jpg(frame):
-    """Save frame to jpg file and return the file path"""
-    temp_img = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-    cv2.imwrite(temp_img.name, frame)
-    return temp_img.name
+
+def put_latest(q, item):
+    """Put item on a bounded queue, dropping the oldest entry if it is full"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except Full:
+            try:
+                q.get_nowait()
+            except Empty:
+                pass
 
 
-def find_best_text_frame(cap, light_ocr, duration=10):
-    """Capture frames for duration seconds and find the one with most text"""
+def find_best_text_frame(cap, light_ocr, duration=10, blur_threshold=100.0, max_workers=2,
+                         batch_size=10, top_k=1):
+    """Capture frames for duration seconds and find the top_k with most text, best first"""
     start_time = time.time()
-    best_frame = None
+    top_frames = []  # min-heap of (word count, frame number, frame)
     best_text_count = 0
     best_text = ""
     frames_analyzed = 0
+    frame_queue = Queue(maxsize=2)  # (frame number, full-res frame), newest frames win
+    results = Queue()  # [(frame number, full-res frame, text), ...] per OCR batch
+    capture_done = threading.Event()
     
-    print(f"Capturing frames for {duration} seconds to find text...")
-    
-    while time.time() - start_time < duration:
-        ret, frame = cap.read()
-        if not ret:
-            continue
-        
-        frames_analyzed += 1
+    def scan_worker():
+        batch = []  # (frame number, full-res frame, scan frame)
         
-        # Save frame to file for OCR processing
-        frame_path = save_frame_to_jpg(frame)
+        def flush():
+            try:
+                texts = light_ocr.process_batch([gray for _, _, gray in batch])
+                results.put([(frame_number, frame, text)
+                             for (frame_number, frame, _), text in zip(batch, texts)])
+            except Exception as e:
+                print(f"Error in OCR processing: {e}")
+            batch.clear()
         
-        try:
-            # Use light OCR to detect text
-            detected_text = light_ocr.process(frame_path)
-            os.unlink(frame_path)  # Clean up
+        while not (capture_done.is_set() and frame_queue.empty()):
+            try:
+                frame_number, frame = frame_queue.get(timeout=0.1)
+            except Empty:
+                continue
             
-            if detected_text:
+            try:
+                # Score a small grayscale copy; the full-res frame is kept for heavy OCR
+                gray = prepare_scan_frame(frame)
+                
+                # Skip blurry frames, they rarely yield readable text
+                if cv2.Laplacian(gray, cv2.CV_32F).var() >= blur_threshold:
+                    batch.append((frame_number, frame, gray))
+                    if len(batch) >= batch_size:
+                        flush()
+            except Exception as e:
+                print(f"Error in OCR processing: {e}")
+        
+        if batch:
+            flush()
+    
+    def collect():
+        nonlocal best_text_count, best_text
+        while not results.empty():
+            for frame_number, frame, detected_text in results.get_nowait():
+                if not detected_text:
+                    continue
+                
                 # Count words as a simple metric
                 word_count = len(re.findall(r'\w+', detected_text))
                 
+                # Keep the top_k candidates for heavy OCR
+                if len(top_frames) < top_k:
+                    heapq.heappush(top_frames, (word_count, frame_number, frame))
+                elif word_count > top_frames[0][0]:
+                    heapq.heapreplace(top_frames, (word_count, frame_number, frame))
+                
                 if word_count > best_text_count:
                     best_text_count = word_count
-                    best_frame = frame.copy()
                     best_text = detected_text
-                    print(f"Frame {frames_analyzed}: Found {word_count} words - New best frame!")
-        except Exception as e:
-            print(f"Error in OCR processing: {e}")
-            if os.path.exists(frame_path):
-                os.unlink(frame_path)
+                    print(f"Frame {frame_number}: Found {word_count} words - New best frame!")
+    
+    print(f"Capturing frames for {duration} seconds to find text...")
+    
+    # Capture, OCR and display overlap: the main thread only feeds frames and shows
+    # the preview, while each worker batches frames into its own tesseract process
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(max_workers):
+            executor.submit(scan_worker)
+        
+        try:
+            while time.time() - start_time < duration:
+                ret, frame = cap.read()
+                if not ret:
+                    continue
+                
+                frames_analyzed += 1
+                
+                # The overlay is drawn in place below, so hand the workers a clean copy
+                put_latest(frame_queue, (frames_analyzed, frame.copy()))
+                
+                collect()
+                
+                # Show frame with "Searching for text..." overlay
+                cv2.putText(frame, "Searching for text...", (50, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                cv2.imshow('Live_Feed', frame)
+                cv2.waitKey(1)
         
-        # Show frame with "Searching for text..." overlay
-        info_frame = frame.copy()
-        cv2.putText(info_frame, "Searching for text...", (50, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        cv2.imshow('Live_Feed', info_frame)
-        cv2.waitKey(1)
+        finally:
+            # Let the workers drain the queue and flush their partial batches
+            capture_done.set()
+    
+    collect()
     
     print(f"Best frame found with {best_text_count} words")
-    return best_frame, best_text
+    best_frames = [frame for _, _, frame in sorted(top_frames, key=lambda item: item[0], reverse=True)]
+    return best_frames, best_text
 
 
 def process_audio(audio_file, transcriber):
@@ -99,6 +202,32 @@ def play_audio_file(audio_path):
         print(f"Error playing audio: {e}")
 
 
+def playback_worker(playback_queue):
+    """Play queued audio files one at a time until a None sentinel arrives"""
+    while True:
+        audio_path = playback_queue.get()
+        if audio_path is None:
+            break
+        play_audio_file(audio_path)
+
+
+def read_text_aloud(best_frames, heavy_ocr, speaker, playback_queue):
+    """Run heavy OCR on the candidate frames and queue the spoken result for playback"""
+    try:
+        # Process the in-memory frames with heavy OCR, voting across the candidates
+        ocr_text = heavy_ocr.process_batch(best_frames)
+        print(f"OCR Result: {ocr_text}")
+        
+        if ocr_text:
+            # Generate speech from OCR text and hand it to the playback thread
+            audio_path = speaker.process(ocr_text)
+            playback_queue.put(audio_path)
+        else:
+            print("No text detected in the selected frame")
+    except Exception as e:
+        print(f"Error in heavy OCR processing: {e}")
+
+
 def process(light_ocr, heavy_ocr, transcriber, speaker):
     """Main processing function"""
     print("Initializing system...")
@@ -114,6 +243,10 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
         frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         print(f"Camera initialized: {frame_width}x{frame_height}")
+        
+        # Keep the driver from queueing stale frames while the main loop is busy
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        grabber = LatestFrameGrabber(cap)
     except Exception as e:
         print(f"Error initializing camera: {e}")
         return
@@ -121,18 +254,26 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
     # Initialize audio recorder with error handling
     try:
         # Set up recorder with 10-second interval
-        recorder = AudioRecorder(threshold=6000, recording_interval=10)
+        recorder = AudioRecorder(threshold=2000, recording_interval=10)
         recorder.start_listening()
     except Exception as e:
         print(f"Failed to initialize audio recorder: {e}")
+        grabber.stop()
         cap.release()
         return
     
+    # Heavy OCR and speech synthesis run off the preview loop; playback is serialized
+    executor = ThreadPoolExecutor(max_workers=2)
+    playback_queue = Queue()
+    playback_thread = threading.Thread(target=playback_worker, args=(playback_queue,))
+    playback_thread.daemon = True
+    playback_thread.start()
+    
     try:
         print("System initializing. Please wait for noise calibration...")
         # Wait for calibration to complete
         while not recorder.is_calibrated:
-            ret, frame = cap.read()
+            ret, frame = grabber.read()
             if ret:
                 cv2.putText(frame, "Calibrating noise...", (50, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
@@ -148,7 +289,7 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
         status_msg = ""
         
         while True:
-            ret, frame = cap.read()
+            ret, frame = grabber.read()
             if not ret:
                 print("Failed to grab frame")
                 break
@@ -161,10 +302,9 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
                 last_status_time = current_time
             
             # Display info on frame
-            info_frame = frame.copy()
-            cv2.putText(info_frame, status_msg, (10, 30), 
+            cv2.putText(frame, status_msg, (10, 30), 
                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.imshow('Live_Feed', info_frame)
+            cv2.imshow('Live_Feed', frame)
             
             # Check if there's audio to process
             if not recorder.audio_queue.empty():
@@ -174,35 +314,16 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
                 transcription = process_audio(audio_file, transcriber)
                 
                 # Check if user is asking about text
-                if transcription and re.search(r'what is written (here|there)', transcription.lower()):
+                if transcription and TRIGGER_RE.search(transcription):
                     print("OCR request detected!")
                     
                     # Find frame with most text
-                    best_frame, light_text = find_best_text_frame(cap, light_ocr)
+                    best_frames, light_text = find_best_text_frame(
+                        grabber, light_ocr, top_k=4 if heavy_ocr.use_gpu else 1)
                     
-                    if best_frame is not None:
-                        # Save frame to temporary file for heavy OCR
-                        temp_img = save_frame_to_jpg(best_frame)
-                        
-                        try:
-                            # Process with heavy OCR
-                            ocr_text = heavy_ocr.process(temp_img)
-                            print(f"OCR Result: {ocr_text}")
-                            
-                            if ocr_text:
-                                # Generate speech from OCR text
-                                audio_path = speaker.process(ocr_text)
-                                
-                                # Play the audio
-                                play_audio_file(audio_path)
-                            else:
-                                print("No text detected in the selected frame")
-                        except Exception as e:
-                            print(f"Error in heavy OCR processing: {e}")
-                        
-                        finally:
-                            if os.path.exists(temp_img):
-                                os.unlink(temp_img)  # Clean up
+                    if best_frames:
+                        # Read the text aloud in the background while the preview keeps running
+                        executor.submit(read_text_aloud, best_frames, heavy_ocr, speaker, playback_queue)
                 
                 # Clean up the audio file
                 if os.path.exists(audio_file):
@@ -224,7 +345,16 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
         except Exception as e:
             print(f"Error stopping recorder: {e}")
         
+        executor.shutdown(wait=False, cancel_futures=True)
+        playback_queue.put(None)
+        
+        try:
+            heavy_ocr.close()
+        except Exception as e:
+            print(f"Error stopping heavy OCR worker: {e}")
+        
         try:
+            grabber.stop()
             cap.release()
             cv2.destroyAllWindows()
         except Exception as e:
@@ -236,7 +366,7 @@ def process(light_ocr, heavy_ocr, transcriber, speaker):
 if __name__ == "__main__":
     try:
         print("Initializing OCR and audio processing components...")
-        light_ocr = LightOCRProcessor(tesseract_cmd='/usr/bin/tesseract', lang='eng', config='--psm 6')
+        light_ocr = LightOCRProcessor(tesseract_cmd='/usr/bin/tesseract', lang='eng', config='--psm 6 -c tessedit_do_invert=0')
         heavy_ocr = HeavyOCRProcessor(use_angle=True, lang='en')
         transcriber = AudioTranscriber(language="en-US")
         speaker = Speaker()
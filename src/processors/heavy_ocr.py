@@ -1,8 +1,91 @@
-from paddleocr import PaddleOCR
-from typing import Optional
+import multiprocessing
+import os
+import queue
+import threading
+from difflib import SequenceMatcher
+from typing import List, Optional, Union
+
+import numpy as np
+
+
+def _ocr_worker(requests, results, ocr_kwargs):
+    """Child-process loop: owns the PaddleOCR model and answers OCR requests."""
+    # main.py caps OpenMP at one thread for tesseract; paddle's threads follow cpu_threads instead
+    os.environ.pop('OMP_THREAD_LIMIT', None)
+    from paddleocr import PaddleOCR
+
+    try:
+        if ocr_kwargs.get('use_gpu') is None:
+            import paddle
+            ocr_kwargs['use_gpu'] = paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+        ocr = PaddleOCR(**ocr_kwargs)
+
+        # the first inference sets up the backend workspaces, pay for it before the first request
+        ocr.ocr(np.zeros((320, 320, 3), dtype=np.uint8), cls=ocr_kwargs.get('use_angle_cls', False))
+    except Exception as e:
+        results.put((False, f"Failed to load PaddleOCR: {e}"))
+        return
+    results.put((True, ocr_kwargs['use_gpu']))  # ready, report the device actually used
+
+    for img, cls in iter(requests.get, None):
+        try:
+            if isinstance(img, list):
+                # several images in one round trip
+                results.put((True, [ocr.ocr(i, cls=cls) for i in img]))
+            else:
+                results.put((True, ocr.ocr(img, cls=cls)))
+        except Exception as e:
+            results.put((False, str(e)))
+
+
+class PaddleOCRWorker:
+    """
+    Runs PaddleOCR in a spawned child process so the main process never carries
+    the model or its inference arenas. Exposes the same `ocr()` call as PaddleOCR.
+    """
+
+    def __init__(self, **ocr_kwargs):
+        ctx = multiprocessing.get_context("spawn")
+        self._requests = ctx.Queue()
+        self._results = ctx.Queue()
+        self._lock = threading.Lock()
+        self._process = ctx.Process(target=_ocr_worker,
+                                    args=(self._requests, self._results, ocr_kwargs),
+                                    daemon=True)
+        self._process.start()
+        self.use_gpu = self._receive()  # wait until the model is loaded
+
+    def _receive(self):
+        while True:
+            try:
+                ok, payload = self._results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError("PaddleOCR worker process exited unexpectedly.")
+        if not ok:
+            raise RuntimeError(payload)
+        return payload
+
+    def ocr(self, img, cls: bool = True):
+        """Runs PaddleOCR on an image, or on each image of a list (returning a list of results)."""
+        # one request in flight at a time, so results can't be mixed up between callers
+        with self._lock:
+            self._requests.put((img, cls))
+            return self._receive()
+
+    def close(self):
+        """Stops the worker process."""
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+
 
 class HeavyOCRProcessor:
-    def __init__(self, use_angle: bool = True, lang: str = 'en'):
+    def __init__(self, use_angle: bool = True, lang: str = 'en', use_gpu: Optional[bool] = None,
+                 cpu_threads: int = 1):
         """
         Parameters:
         -----------
@@ -10,24 +93,40 @@ class HeavyOCRProcessor:
             Whether to enable text direction detection.
         lang : str
             Language parameter for PaddleOCR.
+        use_gpu : Optional[bool]
+            Whether to run inference on the GPU. Detected from the paddle build if None,
+            and set to the detected value once the model is loaded.
+        cpu_threads : int
+            Number of threads PaddleOCR may use when running on the CPU (ignored on GPU).
         """
         self.use_angle = use_angle
         self.lang = lang
-        self.ocr: Optional[PaddleOCR] = None
+        self.use_gpu = use_gpu
+        self.cpu_threads = cpu_threads
+        self.ocr: Optional[PaddleOCRWorker] = None
         self.load_model()
 
     def load_model(self):
-        """Loads the PaddleOCR model into memory. Call this before process()."""
-        self.ocr = PaddleOCR(use_angle=self.use_angle, lang=self.lang)
+        """Loads the PaddleOCR model into a worker process. Call this before process()."""
+        # recognition runs one crop at a time anyway; a larger batch only pre-allocates memory
+        self.ocr = PaddleOCRWorker(use_angle_cls=self.use_angle, lang=self.lang, use_gpu=self.use_gpu,
+                                   rec_batch_num=1, cpu_threads=self.cpu_threads)
+        self.use_gpu = self.ocr.use_gpu
+
+    def close(self):
+        """Stops the PaddleOCR worker process. Call load_model() to use the processor again."""
+        if self.ocr is not None:
+            self.ocr.close()
+            self.ocr = None
 
-    def process(self, img_path: str) -> str:
+    def process(self, img: Union[str, np.ndarray]) -> str:
         """
         Runs OCR on the given image and returns the concatenated text.
 
         Parameters:
         -----------
-        img_path : str
-            Path to the image file.
+        img : Union[str, np.ndarray]
+            Path to the image file, or a BGR frame as returned by OpenCV.
 
         Returns:
         --------
@@ -37,12 +136,44 @@ class HeavyOCRProcessor:
         if self.ocr is None:
             raise RuntimeError("Model not loaded. Please call load_model() first.")
 
-        # run OCR
-        result = self.ocr.ocr(img_path, cls=True)
+        # run OCR; the angle classifier is a second model pass, only run it when enabled
+        result = self.ocr.ocr(img, cls=self.use_angle)
+        return self._join_text(result)
+
+    def process_batch(self, imgs: List[Union[str, np.ndarray]]) -> str:
+        """
+        Runs OCR on several frames of the same scene and returns the transcript
+        the frames agree on most. Each frame is a full PaddleOCR pass, so on the
+        CPU only the best candidate is read.
 
-        # `result` is a list of pages; each page is a list of lines
+        Parameters:
+        -----------
+        imgs : List[Union[str, np.ndarray]]
+            Candidate image paths or BGR frames, best candidate first.
+
+        Returns:
+        --------
+        str
+            The consensus transcript, or an empty string if nothing was detected.
+        """
+        if self.ocr is None:
+            raise RuntimeError("Model not loaded. Please call load_model() first.")
+        if not imgs:
+            return ''
+
+        # voting costs one OCR pass per frame, only affordable on the GPU
+        if not self.use_gpu:
+            imgs = imgs[:1]
+
+        # run OCR on all candidates in a single round trip to the worker
+        results = self.ocr.ocr(list(imgs), cls=self.use_angle)
+        return self._vote([self._join_text(result) for result in results])
+
+    @staticmethod
+    def _join_text(result) -> str:
+        # `result` is a list of pages; each page is a list of lines (None if empty)
         # flatten all lines across all pages
-        lines = [line for page in result for line in page]
+        lines = [line for page in result if page for line in page]
 
         # each `line` is [box, (text, confidence)]
         texts = [line[1][0] for line in lines]
@@ -50,6 +181,20 @@ class HeavyOCRProcessor:
         # join with spaces (you can customize delimiter)
         return ' '.join(texts)
 
+    @staticmethod
+    def _vote(transcripts: List[str]) -> str:
+        """Picks the transcript sharing the most matching text with all the others."""
+        candidates = [text for text in transcripts if text]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else ''
+
+        def agreement(i: int) -> float:
+            return sum(SequenceMatcher(None, candidates[i], other).ratio()
+                       for j, other in enumerate(candidates) if j != i)
+
+        # max() keeps the first of equal scores, i.e. the better-ranked frame
+        return candidates[max(range(len(candidates)), key=agreement)]
+
 
 # if __name__ == '__main__':
 #     # example usage
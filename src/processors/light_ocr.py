@@ -1,7 +1,13 @@
-from typing import Optional
+import os
+import tempfile
+from typing import List, Optional, Union
+import cv2
+import numpy as np
 from PIL import Image
 import pytesseract
 
+PAGE_SEPARATOR = '<<<PAGE>>>'
+
 class LightOCRProcessor:
     def __init__(
         self,
@@ -32,17 +38,18 @@ class LightOCRProcessor:
         """
         if self.tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
-        # you could add sanity checks here (e.g., call pytesseract.get_tesseract_version())
+        # warm up: loads the language data into the OS cache and fails early if tesseract is missing
+        pytesseract.image_to_string(Image.new('L', (32, 32)), lang=self.lang, config=self.config)
         self._loaded = True
 
-    def process(self, img_path: str) -> str:
+    def process(self, img: Union[str, np.ndarray]) -> str:
         """
-        Runs OCR on the image at `img_path` and returns all detected text.
+        Runs OCR on the given image and returns all detected text.
 
         Parameters:
         -----------
-        img_path : str
-            Path to the image file.
+        img : Union[str, np.ndarray]
+            Path to the image file, or a BGR / grayscale frame as returned by OpenCV.
 
         Returns:
         --------
@@ -52,13 +59,65 @@ class LightOCRProcessor:
         if not self._loaded:
             raise RuntimeError("TesseractOCRProcessor not loaded. Call load_model() first.")
 
-        # open image
-        img = Image.open(img_path)
+        # frames are handed over in memory, paths are opened from disk
+        if isinstance(img, np.ndarray):
+            if img.ndim == 2:
+                image = Image.fromarray(img)
+            else:
+                image = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        else:
+            image = Image.open(img)
 
         # run tesseract
-        text = pytesseract.image_to_string(img, lang=self.lang, config=self.config)
+        text = pytesseract.image_to_string(image, lang=self.lang, config=self.config)
         return text.strip()
 
+    def process_batch(self, images: List[Union[str, np.ndarray]]) -> List[str]:
+        """
+        Runs OCR on several images with a single tesseract invocation.
+
+        Tesseract is handed a list file naming every image, so its startup
+        cost is paid once per batch instead of once per image.
+
+        Parameters:
+        -----------
+        images : List[Union[str, np.ndarray]]
+            Image paths and/or BGR / grayscale frames as returned by OpenCV.
+
+        Returns:
+        --------
+        List[str]
+            The raw text output from Tesseract, one entry per input image.
+        """
+        if not self._loaded:
+            raise RuntimeError("TesseractOCRProcessor not loaded. Call load_model() first.")
+        if not images:
+            return []
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # frames have to be on disk for tesseract to read them from the list
+            paths = []
+            for i, img in enumerate(images):
+                if isinstance(img, np.ndarray):
+                    path = os.path.join(tmp_dir, f'frame_{i}.png')
+                    cv2.imwrite(path, img)
+                    paths.append(path)
+                else:
+                    paths.append(img)
+
+            list_file = os.path.join(tmp_dir, 'images.txt')
+            with open(list_file, 'w') as f:
+                f.write('\n'.join(paths) + '\n')
+
+            # run tesseract once over the whole list
+            config = f'{self.config} -c page_separator={PAGE_SEPARATOR}'
+            text = pytesseract.image_to_string(list_file, lang=self.lang, config=config)
+
+        # one page per image; the trailing separator leaves an empty tail
+        pages = [page.strip() for page in text.split(PAGE_SEPARATOR)]
+        pages += [''] * (len(paths) - len(pages))
+        return pages[:len(paths)]
+
 
 # if __name__ == '__main__':
 #     # Example usage
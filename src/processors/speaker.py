@@ -1,18 +1,61 @@
 from gtts import gTTS
+import hashlib
 import os
+import tempfile
+from pathlib import Path
 
 class Speaker:
 
-    def __init__(self):
+    def __init__(self, cache_dir=None, max_cached=64):
 
-        pass
-    
+        # Synthesized clips are kept on disk, keyed by a hash of their text
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(tempfile.gettempdir()) / "vv_tts"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_cached = max_cached
 
-    def process(self, text, output_file = "output.mp3"):
 
-        # Convert text to speech
+    def process(self, text, output_file = None):
+
+        if output_file is not None:
+            # Explicit destination, bypass the cache
+            gTTS(text=text, lang="en", slow=False).save(output_file)
+            return output_file
+
+        cached_file = self.cache_dir / (hashlib.blake2b(text.encode(), digest_size=16).hexdigest() + ".mp3")
+
+        if cached_file.exists():
+            # Mark as recently used so pruning keeps it
+            os.utime(cached_file)
+            return str(cached_file)
+
+        # Convert text to speech, writing under a temporary name so readers never see a partial file
         tts = gTTS(text=text, lang="en", slow=False)
-        
-        tts.save(output_file)
 
-        return output_file
\ No newline at end of file
+        partial_file = cached_file.with_suffix(f".{os.getpid()}.{id(tts)}.part")
+        try:
+            tts.save(str(partial_file))
+            os.replace(partial_file, cached_file)
+        except Exception:
+            # gTTS opens the file before downloading, don't leave an empty part behind
+            if partial_file.exists():
+                partial_file.unlink()
+            raise
+
+        self._prune_cache()
+
+        return str(cached_file)
+
+
+    def _prune_cache(self):
+
+        # Drop the least recently used clips beyond max_cached
+        try:
+            cached = sorted(self.cache_dir.glob("*.mp3"), key=lambda path: path.stat().st_mtime, reverse=True)
+        except OSError:
+            # Another worker pruned a file while we were listing, leave it for next time
+            return
+        for path in cached[self.max_cached:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
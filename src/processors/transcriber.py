@@ -1,4 +1,3 @@
-import os
 import speech_recognition as sr
 from pydub import AudioSegment
 
@@ -41,25 +40,23 @@ class AudioTranscriber:
         else:
             raise ValueError("Unsupported file format. Please use .mp3, .wav, .aiff, or .avi files.")
         
+        # AudioData expects mono PCM, as sr.AudioFile would have produced
+        audio = audio.set_channels(1)
+        
         audio_chunks = [audio[i:i + self.chunk_length_ms] for i in range(0, len(audio), self.chunk_length_ms)]
         full_text = ""
 
         for i, chunk in enumerate(audio_chunks):
-            chunk_file = f"chunk_{i}.wav"
-            chunk.export(chunk_file, format="wav")
-            
-            with sr.AudioFile(chunk_file) as source:
-                audio_data = self.recognizer.record(source)
-                
-                try:
-                    text = self.recognizer.recognize_google(audio_data, language=self.language)
-                    full_text += text + " "
-                except sr.UnknownValueError:
-                    print(f"Could not understand audio in chunk {i}.")
-                except sr.RequestError as e:
-                    print(f"Could not request results from Google Speech Recognition service; {e}.")
+            # Hand the PCM samples already in memory straight to the recognizer
+            audio_data = sr.AudioData(chunk.raw_data, chunk.frame_rate, chunk.sample_width)
             
-            os.remove(chunk_file)
+            try:
+                text = self.recognizer.recognize_google(audio_data, language=self.language)
+                full_text += text + " "
+            except sr.UnknownValueError:
+                print(f"Could not understand audio in chunk {i}.")
+            except sr.RequestError as e:
+                print(f"Could not request results from Google Speech Recognition service; {e}.")
         
         return full_text.strip()
 
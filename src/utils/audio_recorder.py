@@ -3,17 +3,35 @@ import time
 import wave
 import threading
 import tempfile
+from collections import deque
 from queue import Queue
 from datetime import datetime
 
 import numpy as np
-from scipy.signal import butter, filtfilt
+from numba import njit
 import pyaudio
 
 
+@njit(cache=True, fastmath=True)
+def _chunk_energy(samples):
+    """Sum of squared samples, the basis of the RMS speech gate"""
+    energy = 0.0
+    for x in samples:
+        energy += float(x) * float(x)
+    return energy
+
+
+@njit(cache=True, fastmath=True)
+def _score_chunk(samples, attack, consecutive):
+    """Chunk energy and the updated count of consecutive chunks above `attack`"""
+    energy = _chunk_energy(samples)
+    if energy > attack:
+        return energy, consecutive + 1
+    return energy, 0
+
 
 class AudioRecorder:
-    def __init__(self, threshold=6000, chunk_size=1024, format=pyaudio.paInt16, 
+    def __init__(self, threshold=2000, chunk_size=1024, format=pyaudio.paInt16, 
                  channels=1, rate=44100, recording_interval=10):
         self.threshold = threshold
         self.chunk_size = chunk_size
@@ -28,10 +46,17 @@ class AudioRecorder:
         self.audio_queue = Queue()
         self.running = True
         
+        # Chunks handed over from the PyAudio callback thread (about 5 seconds of audio)
+        self.buffer = deque(maxlen=int(5 * rate / chunk_size))
+        self.data_ready = threading.Event()
+        self.overruns = 0  # Chunks lost to device overflow or a full buffer since the last report
+        
         # Parameters for noise filtering
         self.noise_floor = 0
-        self.noise_calibration_samples = []
         self.calibration_period = 3  # seconds
+        # Mean-square level of each calibration chunk, with headroom for timing jitter
+        self.noise_calibration_samples = np.empty(
+            int(self.calibration_period * self.rate / self.chunk_size) + 32, dtype=np.float64)
         self.is_calibrated = False
         
         # Parameters for automatic recording
@@ -40,6 +65,8 @@ class AudioRecorder:
         # Parameters for speech detection
         self.speech_frames_threshold = 3  # Minimum consecutive frames above threshold to detect speech
         self.consecutive_speech_frames = 0
+        self.is_speaking = False
+        self.noise_ema = 0.0  # Running estimate of ambient chunk energy
 
     def start_listening(self):
         """Start listening for audio above threshold"""
@@ -55,6 +82,7 @@ class AudioRecorder:
                                      rate=self.rate,
                                      input=True,
                                      frames_per_buffer=self.chunk_size,
+                                     stream_callback=self._on_audio,
                                      start=False)  # Don't start yet
             
             # Start the stream explicitly after configuration
@@ -72,29 +100,54 @@ class AudioRecorder:
             if self.p:
                 self.p.terminate()
     
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PyAudio callback: hand each chunk over to the processing threads"""
+        if status & pyaudio.paInputOverflow or len(self.buffer) == self.buffer.maxlen:
+            self.overruns += 1
+        self.buffer.append(in_data)
+        self.data_ready.set()
+        return (None, pyaudio.paContinue if self.running else pyaudio.paComplete)
+    
+    def _read_chunk(self, timeout=0.5):
+        """Wait for the next chunk from the callback, or None on timeout"""
+        while self.running:
+            try:
+                return self.buffer.popleft()
+            except IndexError:
+                self.data_ready.clear()
+                # A chunk may have arrived between popleft() and clear()
+                if self.buffer:
+                    continue
+                if not self.data_ready.wait(timeout):
+                    return None
+        return None
+    
     def _calibrate_noise(self):
         """Calibrate noise floor by sampling ambient sound"""
         print(f"Calibrating noise floor for {self.calibration_period} seconds...")
         print("Please remain silent during calibration...")
         
         start_time = time.time()
+        n_samples = 0
         
-        while time.time() - start_time < self.calibration_period:
+        while (time.time() - start_time < self.calibration_period
+               and n_samples < len(self.noise_calibration_samples)):
             try:
-                if self.stream and self.stream.is_active():
-                    data = self.stream.read(self.chunk_size, exception_on_overflow=False)
+                data = self._read_chunk()
+                if data is not None:
                     audio_data = np.frombuffer(data, dtype=np.int16)
-                    volume = np.max(np.abs(audio_data))
-                    self.noise_calibration_samples.append(volume)
-                time.sleep(0.01)
+                    self.noise_calibration_samples[n_samples] = _chunk_energy(audio_data) / len(audio_data)
+                    n_samples += 1
             except Exception as e:
                 print(f"Error during calibration: {e}")
         
-        # Calculate noise floor as mean + 2 standard deviations
-        if self.noise_calibration_samples:
-            mean_noise = np.mean(self.noise_calibration_samples)
-            std_noise = np.std(self.noise_calibration_samples)
+        # Calculate noise floor as mean + 2 standard deviations of the chunk RMS levels
+        if n_samples:
+            volumes = np.sqrt(self.noise_calibration_samples[:n_samples])
+            mean_noise = volumes.mean()
+            std_noise = volumes.std()
             self.noise_floor = mean_noise + 2 * std_noise
+            self.noise_ema = mean_noise ** 2 * self.chunk_size
             
             # Adjust threshold based on noise floor
             self.threshold = max(self.threshold, self.noise_floor * 1.5)
@@ -111,20 +164,30 @@ class AudioRecorder:
         self.listening_thread.daemon = True
         self.listening_thread.start()
     
-    def _butter_bandpass(self, lowcut=300, highcut=3000, fs=44100, order=5):
-        """Design a bandpass filter to focus on human speech frequencies"""
-        nyq = 0.5 * fs
-        low = lowcut / nyq
-        high = highcut / nyq
-        b, a = butter(order, [low, high], btype='band')
-        return b, a
-    
-    def _filter_audio(self, data):
-        """Apply bandpass filter to audio data to focus on speech frequencies"""
-        b, a = self._butter_bandpass()
-        y = filtfilt(b, a, data)
-        return y
+    def _is_speech(self, audio_data):
+        """Update the speech state from a chunk's energy, with hysteresis"""
+        n_samples = len(audio_data)
+        
+        # The gate never drops below the configured RMS threshold and rises with ambient noise
+        attack = max(self.threshold ** 2 * n_samples, self.noise_ema * 1.5 ** 2)
+        release = attack / 4  # Half the RMS level
+        
+        energy, self.consecutive_speech_frames = _score_chunk(
+            audio_data, attack, self.consecutive_speech_frames)
+        
+        if self.consecutive_speech_frames:
+            if self.consecutive_speech_frames == self.speech_frames_threshold:
+                self.is_speaking = True
+                print(f"Speech detected: Volume {np.sqrt(energy / n_samples):.2f} > Threshold {self.threshold:.2f}")
+        elif energy < release:
+            self.is_speaking = False
         
+        # Only track the noise floor while nobody is talking
+        if not self.is_speaking:
+            self.noise_ema = 0.95 * self.noise_ema + 0.05 * energy
+        
+        return self.is_speaking
+    
     def _listen_and_record(self):
         """Listen for audio and record at fixed intervals"""
         print("Audio monitoring started...")
@@ -136,7 +199,7 @@ class AudioRecorder:
         # Initialize recording time
         self.last_recording_time = time.time()
         
-        temp_frames = []  # Buffer for current interval's audio
+        recording = self._open_recording()  # (path, wave writer) for the current interval
         record_start_time = time.time()
         
         while self.running:
@@ -146,37 +209,28 @@ class AudioRecorder:
                 # Check if it's time for a new recording
                 if current_time - self.last_recording_time >= self.recording_interval:
                     print(f"Recording interval reached: {datetime.now().strftime('%H:%M:%S')}")
+                    if self.overruns:
+                        print(f"Warning: {self.overruns} audio chunks overran during this interval")
+                        self.overruns = 0
                     
-                    # Only save if we have enough data
-                    if len(temp_frames) > 0:
-                        self._save_recording(temp_frames)
+                    self._save_recording(recording)
                     
                     # Reset for next interval
-                    temp_frames = []
+                    recording = self._open_recording()
                     self.last_recording_time = current_time
                     record_start_time = current_time
                 
-                # Continuously read audio
-                if self.stream and self.stream.is_active():
-                    data = self.stream.read(self.chunk_size, exception_on_overflow=False)
-                    
-                    # Add raw data to buffer
-                    temp_frames.append(data)
-                    
-                    # Process for speech detection
+                # Block until the callback delivers the next chunk
+                data = self._read_chunk()
+                if data is not None:
                     audio_data = np.frombuffer(data, dtype=np.int16)
-                    filtered_data = self._filter_audio(audio_data)
-                    volume = np.max(np.abs(filtered_data))
                     
-                    # Check for speech patterns (sustained volume above threshold)
-                    if volume > self.threshold:
-                        self.consecutive_speech_frames += 1
-                        if self.consecutive_speech_frames == self.speech_frames_threshold:
-                            print(f"Speech detected: Volume {volume:.2f} > Threshold {self.threshold:.2f}")
-                    else:
-                        self.consecutive_speech_frames = 0
-                
-                time.sleep(0.01)
+                    # Check for speech patterns (sustained energy above threshold)
+                    self._is_speech(audio_data)
+                    
+                    # Stream the raw chunk straight into the open recording
+                    if recording:
+                        recording[1].writeframesraw(data)
                 
             except IOError as e:
                 print(f"Stream read error (non-fatal): {e}")
@@ -184,32 +238,66 @@ class AudioRecorder:
             except Exception as e:
                 print(f"Error in listening thread: {e}")
                 time.sleep(0.5)
+        
+        # Discard the unfinished interval on shutdown
+        self._discard_recording(recording)
     
-    def _save_recording(self, frames):
-        """Save the recorded frames to a temporary file"""
-        # Save the recorded audio to a temporary file
+    def _open_recording(self):
+        """Open a temporary WAV file for the next interval, returns (path, wave writer)"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+        temp_file.close()
         try:
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            
             wf = wave.open(temp_file.name, 'wb')
             wf.setnchannels(self.channels)
             wf.setsampwidth(self.p.get_sample_size(self.format))
             wf.setframerate(self.rate)
-            wf.writeframes(b''.join(frames))
+            return temp_file.name, wf
+        except Exception as e:
+            print(f"Error opening audio file: {e}")
+            os.unlink(temp_file.name)
+            return None
+    
+    def _save_recording(self, recording):
+        """Finish the interval's recording and queue it for processing"""
+        if not recording:
+            return
+        
+        path, wf = recording
+        try:
+            # Only save if we have enough data
+            if wf.getnframes() == 0:
+                self._discard_recording(recording)
+                return
+            
+            # Closing patches the frame count into the WAV header
             wf.close()
             
             # Add to queue for processing
-            self.audio_queue.put(temp_file.name)
-            print(f"Recording saved to {temp_file.name}")
+            self.audio_queue.put(path)
+            print(f"Recording saved to {path}")
             
         except Exception as e:
             print(f"Error saving audio file: {e}")
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+            if os.path.exists(path):
+                os.unlink(path)
+    
+    def _discard_recording(self, recording):
+        """Close and delete a recording that won't be processed"""
+        if not recording:
+            return
+        
+        path, wf = recording
+        try:
+            wf.close()
+        except Exception as e:
+            print(f"Error closing audio file: {e}")
+        if os.path.exists(path):
+            os.unlink(path)
         
     def stop(self):
         """Stop recording and close stream"""
         self.running = False
+        self.data_ready.set()  # Wake any thread waiting for audio
         time.sleep(0.2)  # Give threads time to notice
         
         if hasattr(self, 'stream') and self.stream: